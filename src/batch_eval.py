@@ -0,0 +1,261 @@
+"""
+Headless batch evaluation of the chatbot graph across Ollama models.
+
+Reads prompts from a JSONL file (one {"id": ..., "prompt": ...} object per line),
+runs them through the compiled graph for each selected model with bounded
+concurrency, and appends every result to <output_dir>/<prompts>__<model>.jsonl as
+soon as it completes. Prompts already answered in that file (same id and same
+prompt text) are skipped on the next run, so an interrupted evaluation resumes
+where it stopped.
+
+Example:
+    python src/batch_eval.py prompts.jsonl --models granite3.3:8b qwen3:14b --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Any
+
+import mlflow
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from config import MLflowLoggingSettings
+from main import OLLAMA_MODELS, build_graph
+from tools import MCPToolsManager, MemoryManager
+
+
+def load_prompts(prompts_path: str) -> List[Dict[str, str]]:
+    """Load prompts from a JSONL file, using the line number when no id is given"""
+    prompts = []
+    seen_ids = set()
+    with open(prompts_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or "prompt" not in record:
+                raise ValueError(f"Missing 'prompt' on line {line_number} of {prompts_path}")
+            prompt_id = str(record.get("id", line_number))
+            if prompt_id in seen_ids:
+                raise ValueError(f"Duplicate prompt id '{prompt_id}' on line {line_number} of {prompts_path}")
+            seen_ids.add(prompt_id)
+            prompts.append({"id": prompt_id, "prompt": record["prompt"]})
+    return prompts
+
+
+def results_path_for(output_dir: str, prompts_path: str, model_name: str) -> str:
+    """Get the results file for a prompts file and model (':' is not safe in file names)"""
+    prompts_name = os.path.splitext(os.path.basename(prompts_path))[0]
+    return os.path.join(output_dir, f"{prompts_name}__{model_name.replace(':', '_')}.jsonl")
+
+
+def load_completed_results(results_path: str) -> Dict[str, dict]:
+    """Load successful results from a previous run, keyed by prompt id"""
+    completed = {}
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interruption - that prompt is re-run
+                continue
+            if not record.get("error"):
+                completed[record["prompt_id"]] = record
+    return completed
+
+
+def terminate_partial_line(results_path: str) -> None:
+    """Close off a line cut short by an interruption so the next append starts on a fresh line"""
+    if not os.path.exists(results_path) or os.path.getsize(results_path) == 0:
+        return
+    with open(results_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize_messages(messages: list) -> Dict[str, Any]:
+    """Extract the final response, token usage and tool-call count from a thread"""
+    summary = {"response": "", "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "tool_calls": 0}
+    for message in messages:
+        if not isinstance(message, AIMessage):
+            continue
+        if message.content:
+            summary["response"] = message.content
+        summary["tool_calls"] += len(message.tool_calls)
+        usage = message.usage_metadata or {}
+        summary["input_tokens"] += usage.get("input_tokens", 0)
+        summary["output_tokens"] += usage.get("output_tokens", 0)
+        summary["total_tokens"] += usage.get("total_tokens", 0)
+    return summary
+
+
+async def run_prompt(graph, model_name: str, prompt: Dict[str, str], semaphore: asyncio.Semaphore) -> dict:
+    """Run a single prompt through the graph in its own thread"""
+    thread_id = f"batch:{model_name}:{prompt['id']}"
+    record = {
+        "model": model_name,
+        "prompt_id": prompt["id"],
+        "thread_id": thread_id,
+        "prompt": prompt["prompt"],
+    }
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            state = await graph.ainvoke(
+                {"messages": [{"role": "user", "content": prompt["prompt"]}]},
+                config={"configurable": {"thread_id": thread_id}},
+            )
+            record.update(summarize_messages(state["messages"]))
+            record["error"] = None
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["latency_s"] = time.perf_counter() - start
+    record["completed_at"] = datetime.now().isoformat()
+    return record
+
+
+async def evaluate_model(
+    model_name: str,
+    prompts_path: str,
+    prompts: List[Dict[str, str]],
+    tools_manager: MCPToolsManager,
+    output_dir: str,
+    concurrency: int
+) -> Dict[str, Any]:
+    """Run all pending prompts for one model and return its summary metrics"""
+    results_path = results_path_for(output_dir, prompts_path, model_name)
+
+    # Only reuse a stored answer if the prompt behind that id is still the same
+    prompt_texts = {prompt["id"]: prompt["prompt"] for prompt in prompts}
+    completed = {
+        prompt_id: record
+        for prompt_id, record in load_completed_results(results_path).items()
+        if prompt_texts.get(prompt_id) == record["prompt"]
+    }
+    pending = [prompt for prompt in prompts if prompt["id"] not in completed]
+    print(f"== {model_name}: {len(completed)} already done, {len(pending)} to run ==")
+
+    # Fresh checkpointer and long-term memory so models don't see each other's threads
+    graph = await build_graph(model_name, tools_manager, MemorySaver(), MemoryManager())
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    terminate_partial_line(results_path)
+    start = time.perf_counter()
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        tasks = [asyncio.create_task(run_prompt(graph, model_name, prompt, semaphore)) for prompt in pending]
+        for task in asyncio.as_completed(tasks):
+            record = await task
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+            if record["error"]:
+                failed += 1
+                print(f"[{model_name}] {record['prompt_id']} failed: {record['error']}")
+            else:
+                completed[record["prompt_id"]] = record
+                print(f"[{model_name}] {record['prompt_id']} done in {record['latency_s']:.2f}s")
+    wall_time = time.perf_counter() - start
+
+    # Latency and usage cover every successful prompt, throughput only this session
+    records = [completed[prompt["id"]] for prompt in prompts if prompt["id"] in completed]
+    latencies = [record["latency_s"] for record in records]
+    pending_ids = {prompt["id"] for prompt in pending}
+    session_records = [record for record in records if record["prompt_id"] in pending_ids]
+    session_output_tokens = sum(record["output_tokens"] for record in session_records)
+
+    return {
+        "results_path": results_path,
+        "metrics": {
+            "prompts_completed": len(records),
+            "prompts_failed": failed,
+            "session_wall_time_s": wall_time,
+            "throughput_prompts_per_s": len(session_records) / wall_time if wall_time > 0 else 0.0,
+            "throughput_output_tokens_per_s": session_output_tokens / wall_time if wall_time > 0 else 0.0,
+            "latency_mean_s": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p90_s": percentile(latencies, 90),
+            "latency_p95_s": percentile(latencies, 95),
+            "latency_p99_s": percentile(latencies, 99),
+            "input_tokens": sum(record["input_tokens"] for record in records),
+            "output_tokens": sum(record["output_tokens"] for record in records),
+            "total_tokens": sum(record["total_tokens"] for record in records),
+            "tool_calls": sum(record["tool_calls"] for record in records),
+        },
+    }
+
+
+def print_model_summary(model_name: str, metrics: Dict[str, float]) -> None:
+    """Print the summary metrics for one model"""
+    print(f"== Batch summary: {model_name} ==")
+    print(f"  Prompts completed: {metrics['prompts_completed']} ({metrics['prompts_failed']} failed this session)")
+    print(f"  Throughput: {metrics['throughput_prompts_per_s']:.2f} prompts/s, "
+          f"{metrics['throughput_output_tokens_per_s']:.1f} output tokens/s")
+    print(f"  Latency p50/p90/p95/p99: {metrics['latency_p50_s']:.2f}s / {metrics['latency_p90_s']:.2f}s / "
+          f"{metrics['latency_p95_s']:.2f}s / {metrics['latency_p99_s']:.2f}s")
+    print(f"  Tokens in/out/total: {metrics['input_tokens']} / {metrics['output_tokens']} / {metrics['total_tokens']}")
+    print(f"  Tool calls: {metrics['tool_calls']}")
+
+
+async def run_batch(prompts_path: str, models: List[str], output_dir: str, concurrency: int, autolog: bool) -> None:
+    """Evaluate every model on the prompt file, one MLflow run per model"""
+    logging_settings = MLflowLoggingSettings(
+        tracking_uri="http://127.0.0.1:5000",
+        experiment_name="batch evaluation",
+        enable_system_metrics=True,
+        enable_langchain_autolog=autolog
+    )
+    logging_settings.setup_mlflow(start_run=False)
+
+    prompts = load_prompts(prompts_path)
+    os.makedirs(output_dir, exist_ok=True)
+    tools_manager = MCPToolsManager()
+
+    # Models run one after another so they don't compete for the same GPU
+    for model_name in models:
+        # The run spans the evaluation so system metrics and autolog traces land in it
+        with mlflow.start_run(run_name=f"batch-eval {model_name}"):
+            summary = await evaluate_model(model_name, prompts_path, prompts, tools_manager, output_dir, concurrency)
+            print_model_summary(model_name, summary["metrics"])
+            logging_settings.log_batch_evaluation(
+                model_name,
+                params={"model": model_name, "prompts_file": prompts_path, "prompt_count": len(prompts), "concurrency": concurrency},
+                metrics=summary["metrics"],
+                results_path=summary["results_path"],
+            )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a JSONL prompt file through the chatbot graph for one or more models.")
+    parser.add_argument("prompts", help="JSONL file with one {\"id\": ..., \"prompt\": ...} object per line")
+    parser.add_argument("--models", nargs="+", choices=OLLAMA_MODELS, default=OLLAMA_MODELS, metavar="MODEL",
+                        help="Models to evaluate (default: all OLLAMA_MODELS)")
+    parser.add_argument("--output-dir", default="batch_results", help="Directory for per-model result files")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of prompts in flight per model")
+    parser.add_argument("--autolog", action="store_true", help="Enable MLflow LangChain autologging (one trace per prompt)")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(run_batch(args.prompts, args.models, args.output_dir, args.concurrency, args.autolog))
@@ -18,7 +18,7 @@ class MLflowLoggingSettings:
         self.enable_system_metrics = enable_system_metrics
         self.enable_langchain_autolog = enable_langchain_autolog
     
-    def setup_mlflow(self) -> None:
+    def setup_mlflow(self, start_run: bool = True) -> None:
         """Initialize MLflow with the configured settings"""
         mlflow.set_tracking_uri(uri=self.tracking_uri)
         
@@ -29,7 +29,8 @@ class MLflowLoggingSettings:
             mlflow.langchain.autolog()
         
         mlflow.set_experiment(self.experiment_name)
-        mlflow.start_run()
+        if start_run:
+            mlflow.start_run()
     
     def get_ollama_model_info(self, model_name: str, ollama_url: str = "http://localhost:11434") -> Optional[Dict[str, Any]]:
         """Get model information from Ollama API"""
@@ -115,6 +116,24 @@ class MLflowLoggingSettings:
         model_info = self.get_ollama_model_info(model_name, ollama_url)
         self.log_ollama_model_metadata(model_name, model_info)
     
+    def log_batch_evaluation(
+        self,
+        model_name: str,
+        params: Dict[str, Any],
+        metrics: Dict[str, float],
+        results_path: Optional[str] = None,
+        ollama_url: str = "http://localhost:11434"
+    ) -> None:
+        """Log a batch evaluation summary for one model to the active MLflow run"""
+        self.log_model_and_metadata(model_name, ollama_url)
+        
+        # Log everything in as few requests as possible
+        mlflow.log_params(params)
+        mlflow.log_metrics(metrics)
+        
+        if results_path:
+            mlflow.log_artifact(results_path)
+    
     def print_token_usage_summary(self, traces: list) -> None:
         """Print a summary of token usage from MLflow traces"""
         total_in = 0
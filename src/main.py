@@ -30,8 +30,6 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 
-graph_builder = StateGraph(State)
-
 # Available Ollama models
 OLLAMA_MODELS = [
     "qwen2.5-coder:14b",
@@ -44,29 +42,15 @@ OLLAMA_MODELS = [
     "mistral-small3.2:24b"
 ]
 
-async def main():
-    # Initialize logging settings
-    logging_settings = MLflowLoggingSettings(
-        tracking_uri="http://127.0.0.1:5000",
-        experiment_name="first steps",
-        enable_system_metrics=True,
-        enable_langchain_autolog=True
-    )
-    
-    # Setup MLflow
-    logging_settings.setup_mlflow()
-
-    # Initialize tools manager
-    tools_manager = MCPToolsManager()
+async def build_graph(
+    selected_model: str,
+    tools_manager: MCPToolsManager,
+    checkpointer=memory,
+    long_term_memory: MemoryManager = memory_manager
+):
+    """Build and compile the chatbot graph for the given Ollama model"""
     tools = await tools_manager.get_tools()
 
-    # Select model from available models
-    selected_model = "granite3.3:8b"  # Default selection
-    # You can change this to any model from OLLAMA_MODELS array
-    
-    # Log model metadata to MLflow using the settings class
-    logging_settings.log_model_and_metadata(selected_model)
-
     llm = ChatOllama(
         model=selected_model,
         temperature=0.2,
@@ -93,8 +77,8 @@ async def main():
             query = str(last_message)
         
         # Get relevant memories for context
-        relevant_memories = memory_manager.retrieve_relevant_memories(user_id, query)
-        memory_context = memory_manager.format_memories_for_context(relevant_memories)
+        relevant_memories = long_term_memory.retrieve_relevant_memories(user_id, query)
+        memory_context = long_term_memory.format_memories_for_context(relevant_memories)
         
         # Debug: Print memory retrieval info
         if relevant_memories:
@@ -134,6 +118,7 @@ async def main():
         response = llm.invoke(messages_to_use)
         return {"messages": [response]}
 
+    graph_builder = StateGraph(State)
     graph_builder.add_node("chatbot", chatbot)
     tool_node = await tools_manager.get_tool_node()
     graph_builder.add_node("tools", tool_node)
@@ -147,7 +132,32 @@ async def main():
 
     graph_builder.add_edge(START, "chatbot")
 
-    graph = graph_builder.compile(checkpointer=memory)
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
+async def main():
+    # Initialize logging settings
+    logging_settings = MLflowLoggingSettings(
+        tracking_uri="http://127.0.0.1:5000",
+        experiment_name="first steps",
+        enable_system_metrics=True,
+        enable_langchain_autolog=True
+    )
+    
+    # Setup MLflow
+    logging_settings.setup_mlflow()
+
+    # Initialize tools manager
+    tools_manager = MCPToolsManager()
+
+    # Select model from available models
+    selected_model = "granite3.3:8b"  # Default selection
+    # You can change this to any model from OLLAMA_MODELS array
+    
+    # Log model metadata to MLflow using the settings class
+    logging_settings.log_model_and_metadata(selected_model)
+
+    graph = await build_graph(selected_model, tools_manager)
 
     # mlflow.langchain.log_model(lc_model=llm)
 